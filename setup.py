@@ -4,11 +4,16 @@ setup(
     name="StateSpaceGridApp",
     version="0.0.1",
     packages=find_packages(),
+    python_requires=">=3.10",
     description="GUI for 2D state space grid diagrams and measures for dynamic systems",
     install_requires=[
         "StateSpaceGridLib @ git+https://github.com/DyadicSolutions/StateSpaceGridLib",
+        "numpy",
         "pandas",
         "matplotlib",
         "PySide6"
     ],
+    extras_require={
+        "pyarrow": ["pyarrow"]
+    },
 )
\ No newline at end of file
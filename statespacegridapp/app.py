@@ -1,15 +1,13 @@
 import sys
 import os
+import functools
 
-from typing import List, Callable
+from typing import Dict, List, Callable, Tuple
 
 import PySide6.QtCore
 import PySide6.QtWidgets
 import PySide6.QtGui
 
-import matplotlib.backends.backend_qtagg
-
-import statespacegrid.grid
 import statespacegrid.measure
 import statespacegrid.trajectory
 
@@ -22,12 +20,17 @@ def WidgetClass(cls):
     all of the necessary plumbing with parent layouts/widgets.
     """
     original_init = cls.__init__
+    # Work out once how the class gets added to its parent, not on every instantiation
+    if issubclass(cls, PySide6.QtWidgets.QLayout):
+        add_to_parent = "addLayout"
+    elif issubclass(cls, PySide6.QtWidgets.QWidget):
+        add_to_parent = "addWidget"
+    else:
+        add_to_parent = None
     def new_init(self, parent_widget, *args, **kwargs):
         original_init(self, *args, **kwargs)
-        if issubclass(cls, PySide6.QtWidgets.QLayout):
-            parent_widget.addLayout(self)
-        elif issubclass(cls, PySide6.QtWidgets.QWidget):
-            parent_widget.addWidget(self)
+        if add_to_parent is not None:
+            getattr(parent_widget, add_to_parent)(self)
     cls.__init__ = new_init
     return cls
 
@@ -70,18 +73,33 @@ class TrajectoryListWidget(PySide6.QtWidgets.QScrollArea):
 
         self.inner_widget.setLayout(self.vbox)
         self.setWidget(self.inner_widget)
-        self.traj_data_rows = []
+        self.traj_data_rows: Dict[model.DataObjectHolder, TrajectoryRowWidget] = {}
         controller.resets.append(self.reset)
-        controller.addDataListener(self.updateTrajectories)
+        controller.addDataListener(self.updateTrajectories, incremental=True)
         self.controller = controller
 
-    def updateTrajectories(self, trajectory_data_list: List[model.DataObjectHolder]):
-        self.reset()
-        for traj_data in trajectory_data_list:
-            self.traj_data_rows.append(TrajectoryRowWidget(self.vbox, traj_data))
+    def updateTrajectories(self, added: List[model.DataObjectHolder], removed: List[model.DataObjectHolder]):
+        """
+        Only add and remove the rows that changed, rather than rebuilding the whole list
+        """
+        for traj_data in removed:
+            # Rows may already be gone if the list was reset first
+            row = self.traj_data_rows.pop(traj_data, None)
+            if row is not None:
+                self.vbox.removeWidget(row)
+                row.deleteLater()
+        # added is in sorted order, so each row's final position is already free when it is placed
+        for traj_data in added:
+            row = TrajectoryRowWidget(self.vbox, traj_data)
+            # New rows get appended, so move them to their place in the sorted list
+            index = self.controller.state.indexOf(traj_data)
+            if self.vbox.indexOf(row) != index:
+                self.vbox.removeWidget(row)
+                self.vbox.insertWidget(index, row)
+            self.traj_data_rows[traj_data] = row
 
     def reset(self):
-        for row in self.traj_data_rows:
+        for row in self.traj_data_rows.values():
             self.vbox.removeWidget(row)
             row.deleteLater()
         self.traj_data_rows.clear()
@@ -92,21 +110,35 @@ class VariableDropdownWidget(PySide6.QtWidgets.QComboBox):
     """
     Widget for column selection for input variables
     """
-    def __init__(self, variable_name: str, controller: controller.AppControl, variable_setter: Callable[[str], None], is_optional: bool = False):
+    def __init__(self, variable_name: str, controller: controller.AppControl, variable_setter: Callable[[str], None], is_optional: bool = False, set_on_activation: bool = False):
         super().__init__()
         self.name = variable_name
         self.contents = set()
-        self.currentTextChanged.connect(variable_setter)
+        self.variable_setter = variable_setter
+        self.set_on_activation = set_on_activation
+        if set_on_activation:
+            # Only pass on values the user explicitly picks
+            self.textActivated.connect(variable_setter)
+        else:
+            self.currentTextChanged.connect(variable_setter)
         self.is_optional = is_optional
-        controller.addDataListener(lambda traj_list: self.update_dropdown([header for traj in traj_list for header in traj.headers]))
+        controller.addHeaderListener(self.update_dropdown)
         controller.resets.append(self.reset)
 
-    def update_dropdown(self, var_list: List[str]):
-        if self.is_optional:
-            var_list.insert(0, "")
-        update_set = set(var_list) - self.contents
-        self.contents = self.contents | update_set
-        self.addItems(list(update_set))
+    def update_dropdown(self, headers: Tuple[str, ...]):
+        new_headers = [header for header in headers if header not in self.contents]
+        if self.is_optional and "" not in self.contents:
+            new_headers.insert(0, "")
+        if not new_headers:
+            return
+        self.contents.update(new_headers)
+        previous_text = self.currentText()
+        self.blockSignals(True)
+        self.addItems(new_headers)
+        self.blockSignals(False)
+        # Filling an empty dropdown selects its first item, so pass that on once
+        if not self.set_on_activation and self.currentText() != previous_text:
+            self.variable_setter(self.currentText())
 
     def reset(self):
         self.contents = set()
@@ -118,10 +150,10 @@ class GridVariableAssignWidget(PySide6.QtWidgets.QVBoxLayout):
     Widget which holds a title for a dropdown and the dropdown itself in a
     vbox for the column selection
     """
-    def __init__(self, variable_name: str, controller: controller.AppControl, variable_setter: Callable[[str], None], is_optional: bool=False):
+    def __init__(self, variable_name: str, controller: controller.AppControl, variable_setter: Callable[[str], None], is_optional: bool=False, set_on_activation: bool=False):
         super().__init__()
         TitleWidget(self, variable_name)
-        self.dropdown = VariableDropdownWidget(self, variable_name, controller, variable_setter, is_optional=is_optional)
+        self.dropdown = VariableDropdownWidget(self, variable_name, controller, variable_setter, is_optional=is_optional, set_on_activation=set_on_activation)
         controller.resets.append(self.reset)
 
     @property
@@ -179,8 +211,13 @@ class OptionsAndInfoWidget(PySide6.QtWidgets.QHBoxLayout):
         self.onset = GridVariableAssignWidget(self, "Onset", controller, controller.state.set_t_header)
         self.x_range = GridRangeAssignWidget(self, "x range", controller.state.set_x_range)
         self.y_range = GridRangeAssignWidget(self, "y range", controller.state.set_y_range)
-        self.onset = GridVariableAssignWidget(self, "Split by ID", controller, controller.state.addSplitByID, is_optional=True)
-        ActionButtonWidget(self, "Plot", controller.plot)
+        self.split_by_id = GridVariableAssignWidget(self, "Split by ID", controller, controller.state.addSplitByID, is_optional=True, set_on_activation=True)
+        # Repeated plot requests within one event loop pass collapse into a single plot
+        self.plot_timer = PySide6.QtCore.QTimer(self)
+        self.plot_timer.setSingleShot(True)
+        self.plot_timer.setInterval(0)
+        self.plot_timer.timeout.connect(controller.plot)
+        ActionButtonWidget(self, "Plot", lambda: self.plot_timer.start())
         ActionButtonWidget(self, "Delete All", controller.reset)
 
 @WidgetClass
@@ -229,36 +266,57 @@ class ExportToolbar(PySide6.QtWidgets.QHBoxLayout):
 
 
 
-@WidgetClass
-class SSGWidget(matplotlib.backends.backend_qtagg.FigureCanvasQTAgg):
-    """
-    Widget to hold the matplotlib plot output from statespacegrid.grid.draw
-    """
-    def __init__(self, controller: controller.AppControl):
-        self.controller = controller
-        self.fig, self.ax = statespacegrid.grid.draw(statespacegrid.trajectory.Trajectory(), display=False)
-        self.controller.set_plot_structures(self.fig, self.ax)
-        self.controller.plot_listener = lambda trajectory_list, x_header, y_header: self.plot(*trajectory_list, x_label=x_header, y_label=y_header)
-        self.controller.resets.append(self.reset)
-        super().__init__(self.fig)
-
-    def plot(self, *trajectories, x_label=None, y_label=None):
-        self.clear()
-        if trajectories:
-            statespacegrid.grid.draw(*trajectories, fig=self.fig, ax=self.ax, display=False, xlabel=x_label, ylabel=y_label)
-        self.draw()
-
-    def clear(self):
-        for line in self.ax.lines:
-            line.remove()
-        for patch in self.ax.patches:
-            patch.remove()
-        self.ax.set_xlabel("")
-        self.ax.set_ylabel("")
-        self.draw()
-
-    def reset(self):
-        self.clear()
+@functools.cache
+def ssg_widget_class():
+    """
+    Build the SSGWidget class. The matplotlib Qt backend (its base class) and
+    statespacegrid.grid are slow to import, so this is put off until the grid
+    is first created rather than done at app import
+    """
+    import matplotlib
+    from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+    import statespacegrid.grid
+
+    # Lets Agg drop trajectory vertices within a pixel of the simplified line.
+    # Paths take these settings when they're created, so they only need to be in
+    # place while grid.draw builds the lines
+    simplify_settings = {"path.simplify": True, "path.simplify_threshold": 1.0}
+
+    @WidgetClass
+    class SSGWidget(FigureCanvasQTAgg):
+        """
+        Widget to hold the matplotlib plot output from statespacegrid.grid.draw
+        """
+        def __init__(self, controller: controller.AppControl):
+            self.controller = controller
+            self.fig, self.ax = statespacegrid.grid.draw(statespacegrid.trajectory.Trajectory(), display=False)
+            self.controller.set_plot_structures(self.fig, self.ax)
+            self.controller.plot_listener = lambda trajectory_list, x_header, y_header: self.plot(*trajectory_list, x_label=x_header, y_label=y_header)
+            self.controller.resets.append(self.reset)
+            super().__init__(self.fig)
+
+        def plot(self, *trajectories, x_label=None, y_label=None):
+            # Only redraw once, after the new trajectories are in place
+            self.clear(redraw=False)
+            if trajectories:
+                with matplotlib.rc_context(simplify_settings):
+                    statespacegrid.grid.draw(*trajectories, fig=self.fig, ax=self.ax, display=False, xlabel=x_label, ylabel=y_label)
+            self.draw_idle()
+
+        def clear(self, redraw=True):
+            for line in self.ax.lines:
+                line.remove()
+            for patch in self.ax.patches:
+                patch.remove()
+            self.ax.set_xlabel("")
+            self.ax.set_ylabel("")
+            if redraw:
+                self.draw_idle()
+
+        def reset(self):
+            self.clear()
+
+    return SSGWidget
 
 
 @WidgetClass
@@ -336,8 +394,54 @@ class PlotAndMeasures(PySide6.QtWidgets.QHBoxLayout):
     def __init__(self, controller: controller.AppControl):
         super().__init__()
         # TODO - try to add stretches
-        self.grid = SSGWidget(self, controller)
+        # The grid gets built once the event loop is running, so the window can
+        # show before matplotlib's Qt backend is imported
+        self.grid = None
+        self.grid_layout = PySide6.QtWidgets.QVBoxLayout()
+        self.addLayout(self.grid_layout)
         self.measures = MeasuresWindow(self, controller)
+        PySide6.QtCore.QTimer.singleShot(0, lambda: self.buildGrid(controller))
+
+    def buildGrid(self, controller: controller.AppControl):
+        self.grid = ssg_widget_class()(self.grid_layout, controller)
+
+
+class DropLoad:
+    """
+    Tracks the files of a single drop, so they can be added to the app state
+    together once the last of them has been parsed
+    """
+    def __init__(self, file_count: int):
+        self.pending = file_count
+        self.loaded = []
+
+
+class FileLoadSignals(PySide6.QtCore.QObject):
+    """
+    Signals used to hand the result of a background file read back to the GUI thread
+    """
+    fileLoaded = PySide6.QtCore.Signal(object, str, object)
+    fileFailed = PySide6.QtCore.Signal(object, str, str)
+
+
+class FileLoadTask(PySide6.QtCore.QRunnable):
+    """
+    Parses a single data file on the thread pool so that large files don't block the GUI
+    """
+    def __init__(self, drop: DropLoad, file_path: str, controller: controller.AppControl, signals: FileLoadSignals):
+        super().__init__()
+        self.drop = drop
+        self.file_path = file_path
+        self.controller = controller
+        self.signals = signals
+
+    def run(self):
+        try:
+            data = self.controller.load_file(self.file_path)
+        except Exception as e:
+            self.signals.fileFailed.emit(self.drop, self.file_path, str(e))
+        else:
+            self.signals.fileLoaded.emit(self.drop, self.file_path, data)
 
 
 class AppWindow(PySide6.QtWidgets.QMainWindow):
@@ -365,6 +469,12 @@ class AppWindow(PySide6.QtWidgets.QMainWindow):
         self.options = OptionsAndInfoWidget(self.main_layout, self.controller)
         self.trajectory_list = None # placeholder until we drag a trajectory in
 
+        # Files are parsed on the thread pool - queued connections make sure the
+        # results are added to the app state back on the GUI thread
+        self.file_load_signals = FileLoadSignals()
+        self.file_load_signals.fileLoaded.connect(self.onFileLoaded, PySide6.QtCore.Qt.ConnectionType.QueuedConnection)
+        self.file_load_signals.fileFailed.connect(self.onFileFailed, PySide6.QtCore.Qt.ConnectionType.QueuedConnection)
+
 
     def plotAllData(self):
         self.controller.plot()
@@ -384,8 +494,27 @@ class AppWindow(PySide6.QtWidgets.QMainWindow):
             )
 
         if event.mimeData().hasUrls():
-            for file_path in event.mimeData().urls():
-                self.controller.read_file(file_path.toLocalFile())
+            file_paths = [url.toLocalFile() for url in event.mimeData().urls()]
+            drop = DropLoad(len(file_paths))
+            for file_path in file_paths:
+                PySide6.QtCore.QThreadPool.globalInstance().start(
+                    FileLoadTask(drop, file_path, self.controller, self.file_load_signals)
+                )
+
+    def onFileLoaded(self, drop: DropLoad, file_path: str, data):
+        drop.loaded.append((file_path, data))
+        self.finishDropFile(drop)
+
+    def onFileFailed(self, drop: DropLoad, file_path: str, message: str):
+        self.finishDropFile(drop)
+        raise controller.AppError(f"{file_path}: {message}")
+
+    def finishDropFile(self, drop: DropLoad):
+        # Only the drop's own files are batched, so listeners get a single
+        # update for them without holding back any other change to the state
+        drop.pending -= 1
+        if not drop.pending and drop.loaded:
+            self.data_model.addDataObjectsBatch(drop.loaded)
 
 def main():
     app = PySide6.QtWidgets.QApplication(sys.argv)
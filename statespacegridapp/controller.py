@@ -1,7 +1,7 @@
-import inspect
+import csv
 import os
-from typing import List, Callable, Optional
-from dataclasses import asdict
+from typing import List, Callable, Optional, Tuple
+from dataclasses import fields
 
 import pandas as pd
 from matplotlib import figure, axes
@@ -11,26 +11,79 @@ import statespacegrid.measure
 
 from statespacegridapp import model
 
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
+
 class AppError(Exception):
     def __init__(self, message):
         super().__init__(message)
 
+# (extension, method name) for every AppControl method decorated with file_reader
+_FILE_READERS: List[Tuple[str, str]] = []
+
 def file_reader(extension: str):
     def decorator(func):
-        func.extension_handler = extension
+        _FILE_READERS.append((extension, func.__name__))
         return func
     return decorator
 
+def _measure_to_dict(measures: statespacegrid.measure.Measures) -> dict:
+    # Shallow equivalent of dataclasses.asdict - Measures only holds plain values,
+    # so asdict's recursive deepcopy isn't needed
+    return {measure.name: getattr(measures, measure.name) for measure in fields(measures)}
+
+# Rows per chunk when falling back to the default pandas parser
+CSV_CHUNK_ROWS = 1 << 16
+
+if pa is not None:
+    # pyarrow's missing value strings plus the two extra ones pandas' parser uses
+    _ARROW_NULL_VALUES = [*pa_csv.ConvertOptions().null_values, "<NA>", "None"]
+    _ARROW_STRING_DTYPE = pd.StringDtype("pyarrow")
+
+def _read_delimited_arrow(file_path: str, sep: str, header: List[str]) -> pd.DataFrame:
+    # Every column is typed as a string up front, so cells like '007', 'TRUE'
+    # or '1e3' are kept exactly as written rather than inferred and converted back
+    table = pa_csv.read_csv(
+        file_path,
+        parse_options=pa_csv.ParseOptions(delimiter=sep),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            null_values=_ARROW_NULL_VALUES,
+            strings_can_be_null=True
+        )
+    )
+    return table.to_pandas(types_mapper={pa.string(): _ARROW_STRING_DTYPE}.get)
+
+def read_delimited(file_path: str, sep: str = ",") -> pd.DataFrame:
+    """
+    Read a delimited text file with every column as strings, using pyarrow
+    when it is installed and the default pandas parser otherwise.
+    With pyarrow the strings are kept in Arrow memory rather than as Python
+    objects. The default parser reads in chunks so the tokenizer's buffers
+    stay small on large files
+    """
+    if pa is not None:
+        with open(file_path, newline="", encoding="utf-8-sig") as file:
+            header = next(csv.reader(file, delimiter=sep), [])
+        # pandas renames duplicate and blank headers (x.1, Unnamed: 2), pyarrow doesn't
+        if header and all(header) and len(set(header)) == len(header):
+            try:
+                return _read_delimited_arrow(file_path, sep, header)
+            except pa.ArrowInvalid:
+                # pyarrow rejects files the default parser accepts, such as
+                # short rows (which get padded with NaN)
+                pass
+    chunks = list(pd.read_csv(file_path, dtype=str, sep=sep, chunksize=CSV_CHUNK_ROWS))
+    return pd.concat(chunks, ignore_index=True)
 
 class AppControl:
 
     def __init__(self):
         self.state = model.AppState()
-        self.file_readers = {}
-        for attr_name in dir(AppControl):
-            attr = getattr(self, attr_name)
-            if inspect.ismethod(attr) and hasattr(attr, "extension_handler"):
-                self.file_readers[attr.extension_handler] = attr
+        self.file_readers = {extension: getattr(self, name) for extension, name in _FILE_READERS}
         self.plot_listener: Optional[Callable[[List[statespacegrid.trajectory.Trajectory], str, str]]] = None
         self.measure_listener: Optional[Callable[[statespacegrid.measure.Measures]]] = None
         self.resets: List[Callable[[], None]] = []
@@ -57,21 +110,22 @@ class AppControl:
         measures_list = []
         if do_for_individual_trajectories:
             for id, traj in zip(trajectory_ids, trajectories):
-                measures_list.append({"id": id} | asdict(statespacegrid.measure.get_measures(traj)))
+                measures_list.append({"id": id} | _measure_to_dict(statespacegrid.measure.get_measures(traj)))
         else:
-            measures_list.append(asdict(statespacegrid.measure.get_measures(*trajectories)))
-
-        with open(path, "w") as ofile:
-            pd.DataFrame(measures_list).to_csv(path, index=False)
+            measures_list.append(_measure_to_dict(statespacegrid.measure.get_measures(*trajectories)))
 
+        pd.DataFrame(measures_list).to_csv(path, index=False)
 
     def reset(self):
         for reset_func in self.resets:
             reset_func()
         self.state.reset()
 
-    def addDataListener(self, listener):
-        self.state.addDataListener(listener)
+    def addDataListener(self, listener, incremental=False):
+        self.state.addDataListener(listener, incremental=incremental)
+
+    def addHeaderListener(self, listener):
+        self.state.addHeaderListener(listener)
 
     def set_plot_structures(self, fig: figure.Figure, ax: axes.Axes):
         self.state.set_plot_structures(fig, ax)
@@ -82,43 +136,57 @@ class AppControl:
         if not self.state.x_range or not self.state.y_range:
             raise AppError("Set the x and y range as a comma separated list in the for '1,2,3' or 'a,b,c' before plotting")
 
-        return [
-            statespacegrid.trajectory.Trajectory(
-                x_range = self.state.x_range,
-                y_range = self.state.y_range,
-                states=list(zip(data.data[self.state.x_header].dropna().tolist(), data.data[self.state.y_header].dropna().tolist())),
-                times=data.data[self.state.t_header].dropna().astype(float).tolist()
-            )
-            for data in self.state.getDataObjects()
-            if data.selected
-        ]
-
-    def read_file(self, file_path):
+        key = (
+            self.state.x_header,
+            self.state.y_header,
+            self.state.t_header,
+            tuple(self.state.x_range),
+            tuple(self.state.y_range)
+        )
+        trajectories = []
+        for data in self.state.getDataObjects():
+            if not data.selected:
+                continue
+            trajectory = data._traj_cache.get(key)
+            if trajectory is None:
+                trajectory = data._traj_cache[key] = self._buildTrajectory(data)
+            trajectories.append(trajectory)
+        return trajectories
+
+    def _buildTrajectory(self, data: model.DataObjectHolder) -> statespacegrid.trajectory.Trajectory:
+        states, times = data.trajectoryData(self.state.x_header, self.state.y_header, self.state.t_header)
+        return statespacegrid.trajectory.Trajectory(
+            x_range = self.state.x_range,
+            y_range = self.state.y_range,
+            states=states,
+            times=times
+        )
+
+    def load_file(self, file_path) -> pd.DataFrame:
+        """
+        Parse a data file without touching app state, so it is safe to call
+        from a worker thread
+        """
         extension = os.path.splitext(file_path)[-1]
         if extension in self.file_readers:
-            self.file_readers[extension](file_path)
-        else:
-            raise AppError(f"StateSpaceGridApp can't handle file of extension type {extension}. Please use one of {', '.join(self.file_readers.keys())}")
+            return self.file_readers[extension](file_path)
+        raise AppError(f"StateSpaceGridApp can't handle file of extension type {extension}. Please use one of {', '.join(self.file_readers.keys())}")
 
     @file_reader(".csv")
     def read_csv(self, file_path):
-        data = pd.read_csv(file_path, dtype=str)
-        self.state.addDataObject(file_path, data)
+        return read_delimited(file_path)
 
     @file_reader(".traj")
     def read_traj(self, file_path):
-        data = pd.read_csv(file_path, dtype=str, sep="\t")
-        self.state.addDataObject(file_path, data)
+        return read_delimited(file_path, sep="\t")
 
     @file_reader(".tsv")
     def read_tsv(self, file_path):
-        data = pd.read_csv(file_path, dtype=str, sep="\t")
-        self.state.addDataObject(file_path, data)
+        return read_delimited(file_path, sep="\t")
 
     @file_reader('xls')
     def read_xls(self, file_path):
-        data = pd.read_excel(file_path, dtype=str)
-        self.state.addDataObject(file_path, data)
+        return pd.read_excel(file_path, dtype=str)
 
     def canHandle(self, extension):
         return extension in self.file_readers
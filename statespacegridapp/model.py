@@ -1,33 +1,100 @@
+import bisect
 import os
+import re
+from contextlib import contextmanager
+from functools import partial
 from dataclasses import dataclass, field
-from typing import List, Optional, Callable
+from typing import Any, Dict, Iterable, List, Optional, Callable, Tuple
 from operator import attrgetter
 
-from pandas import DataFrame
+import numpy as np
+from pandas import DataFrame, to_numeric
 from matplotlib import figure, axes
 
-@dataclass
+# Splits a comma separated range, stripping the whitespace around each tick in the same pass
+_RANGE_RE = re.compile(r"\s*,\s*")
+# Orders DataObjectHolders by filename, then id
+_SORT_KEY = attrgetter("_sort_key")
+
+@dataclass(frozen=True, slots=True)
 class DataObjectIdentifier:
     filename: str
     id: Optional[str] = None
+    # identifiers can't change, so the display string is only built once
+    _str: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_str", f"{self.filename}::{self.id}" if self.id is not None else self.filename)
 
     def __str__(self):
-        if self.id is not None:
-            return f"{self.filename}::{self.id}"
-        return self.filename
+        return self._str
 
-@dataclass
+@dataclass(eq=False, slots=True)
 class DataObjectHolder:
     """
-    dataclass to hold a single input file's data
+    dataclass to hold a single input file's data.
+    Compared and hashed by identity, so holders can be used as dict keys
     """
     filename: DataObjectIdentifier
-    headers: List[str]
-    data: DataFrame
+    headers: Tuple[str, ...]
+    # returns this object's rows. A split id's rows are taken from the parent
+    # file's groupby whenever they are needed, rather than kept as a copy
+    load_data: Callable[[], DataFrame]
     selected: bool = True
+    # trajectories already built from this data, keyed by (x, y, t, x_range, y_range)
+    _traj_cache: Dict[Tuple, Any] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # states and times already extracted from this data, keyed by the (x, y, t) headers used
+    _col_cache: Dict[Tuple[str, str, str], Tuple[list, list]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # data objects for each id in this data, keyed by the id header split on
+    _split_cache: Dict[str, List["DataObjectHolder"]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # position in AppState's lists - by filename, then id
+    _sort_key: Tuple[str, str] = field(init=False, repr=False, compare=False)
 
-    def splitById(self, id_header):
-        return self.data.groupby(id_header)
+    def __post_init__(self):
+        self._sort_key = (self.filename.filename, self.filename.id or "")
+
+    @property
+    def data(self) -> DataFrame:
+        return self.load_data()
+
+    def trajectoryData(self, x_header: str, y_header: str, t_header: str) -> Tuple[List[Tuple[str, str]], List[float]]:
+        """
+        States and onset times from every row with x, y and a numeric onset all
+        present, so each state keeps its own time. If the last row with an onset
+        has no state, its onset is kept as the end time of the final event
+        """
+        key = (x_header, y_header, t_header)
+        trajectory_data = self._col_cache.get(key)
+        if trajectory_data is None:
+            data = self.data
+            times = to_numeric(data[t_header], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            has_time = ~np.isnan(times)
+            has_state = data[[x_header, y_header]].notna().all(axis=1).to_numpy()
+            rows = has_state & has_time
+            states = list(data.loc[rows, [x_header, y_header]].itertuples(index=False, name=None))
+            event_times = times[rows].tolist()
+            timed_rows = np.flatnonzero(has_time)
+            if timed_rows.size and not has_state[timed_rows[-1]]:
+                event_times.append(float(times[timed_rows[-1]]))
+            trajectory_data = self._col_cache[key] = (states, event_times)
+        return trajectory_data
+
+    def splitById(self, id_header) -> List["DataObjectHolder"]:
+        """
+        One data object per id in the id_header column. These are kept, so
+        switching back to an earlier split doesn't regroup the data
+        """
+        split_data_objects = self._split_cache.get(id_header)
+        if split_data_objects is None:
+            groups = self.data.groupby(id_header, sort=False, observed=True)
+            split_data_objects = self._split_cache[id_header] = [
+                DataObjectHolder(
+                    DataObjectIdentifier(self.filename.filename, id=f"{id}"),
+                    self.headers,
+                    partial(groups.get_group, id))
+                for id in groups.groups
+            ]
+        return split_data_objects
 
     def setSelected(self, is_selected):
         self.selected = is_selected
@@ -50,52 +117,161 @@ class AppState:
 
 
     data_object_listeners: List[Callable[..., None]] = field(default_factory=list)
+    incremental_data_object_listeners: List[Callable[[List[DataObjectHolder], List[DataObjectHolder]], None]] = field(default_factory=list)
+    header_listeners: List[Callable[[Tuple[str, ...]], None]] = field(default_factory=list)
+    _batch_depth: int = field(default=0, init=False, repr=False)
+    _update_pending: bool = field(default=False, init=False, repr=False)
+    # the data objects as of the last update, to work out what incremental listeners need
+    _notified_data_objects: Tuple[DataObjectHolder, ...] = field(default=(), init=False, repr=False)
+    # Bumped whenever the data objects change. Values derived from them store the
+    # version they were worked out at, and are only recomputed when it moves on.
+    # Starts ahead of them, as data objects can also be passed in at construction
+    _version: int = field(default=1, init=False, repr=False)
+    _notified_version: int = field(default=0, init=False, repr=False)
+    _view: Tuple[DataObjectHolder, ...] = field(default=(), init=False, repr=False)
+    _view_version: int = field(default=0, init=False, repr=False)
+    _ids_cache: List[str] = field(default_factory=list, init=False, repr=False)
+    _ids_version: int = field(default=0, init=False, repr=False)
+    _headers_cache: Tuple[str, ...] = field(default=(), init=False, repr=False)
+    _headers_version: int = field(default=0, init=False, repr=False)
 
-    def getDataObjects(self) -> List[DataObjectHolder]:
-        return self.split_data_objects if self.split_data_objects else self.data_objects
+    def getDataObjects(self) -> Tuple[DataObjectHolder, ...]:
+        """
+        The data objects currently in use, sorted by filename and id.
+        This is a read-only snapshot - the same tuple is returned until the data objects change
+        """
+        if self._view_version != self._version:
+            self._view = tuple(self.split_data_objects if self.split_data_objects else self.data_objects)
+            self._view_version = self._version
+        return self._view
 
     def getIDs(self) -> List[str]:
-        return [str(data_obj.filename) for data_obj in self.getDataObjects()]
+        if self._ids_version != self._version:
+            self._ids_cache = [str(data_obj.filename) for data_obj in self.getDataObjects()]
+            self._ids_version = self._version
+        return self._ids_cache
+
+    def indexOf(self, data_object: DataObjectHolder) -> int:
+        """
+        Position of a data object in getDataObjects()
+        """
+        data_objects = self.getDataObjects()
+        index = bisect.bisect_left(data_objects, data_object._sort_key, key=_SORT_KEY)
+        # Holders with equal keys (the same file dropped twice) sit next to each other
+        while data_objects[index] is not data_object:
+            index += 1
+        return index
 
     def update(self):
         """
-        For all callbacks in data_object_listeners, pass in a list of DataObjectHolders sorted by filename and id
+        For all callbacks in data_object_listeners, pass in a tuple of DataObjectHolders sorted by filename and id.
+        For all callbacks in incremental_data_object_listeners, pass in the DataObjectHolders added and removed
+        since the last update, if there are any.
+        For all callbacks in header_listeners, pass in the headers across all of them, deduplicated in
+        the order they first appear.
+        Inside a batch update this is held back until the batch ends
         """
-        data_objects = sorted(self.getDataObjects(), key=attrgetter("filename.filename", "filename.id"))
-        for listener in self.data_object_listeners:
+        if self._batch_depth:
+            self._update_pending = True
+            return
+        data_object_listeners = self.data_object_listeners
+        incremental_listeners = self.incremental_data_object_listeners
+        header_listeners = self.header_listeners
+        if not data_object_listeners and not incremental_listeners and not header_listeners:
+            return
+        # Both lists are kept sorted as they're added to, so no sort is needed here
+        data_objects = self.getDataObjects()
+        for listener in data_object_listeners:
             listener(data_objects)
+        if incremental_listeners and self._notified_version != self._version:
+            previous = self._notified_data_objects
+            previous_set = set(previous)
+            current_set = set(data_objects)
+            added = [data_object for data_object in data_objects if data_object not in previous_set]
+            removed = [data_object for data_object in previous if data_object not in current_set]
+            self._notified_data_objects = data_objects
+            self._notified_version = self._version
+            if added or removed:
+                for listener in incremental_listeners:
+                    listener(added, removed)
+        if header_listeners:
+            if self._headers_version != self._version:
+                self._headers_cache = tuple(dict.fromkeys(header for data_object in data_objects for header in data_object.headers))
+                self._headers_version = self._version
+            headers = self._headers_cache
+            for listener in header_listeners:
+                listener(headers)
+
+    @contextmanager
+    def batchUpdate(self):
+        """
+        Context manager to send listeners a single update for all changes made inside it
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._update_pending:
+                self._update_pending = False
+                self.update()
 
     def addDataObject(self, file_path: str, data: DataFrame):
-        headers = list(data.keys())
-        filename = os.path.basename(file_path)
-        self.data_objects.append(DataObjectHolder(DataObjectIdentifier(filename), headers, data))
+        self._version += 1
+        headers = tuple(data.columns.tolist())
+        # Windows accepts both separators, so normalise to one before taking the last component
+        if os.altsep:
+            file_path = file_path.replace(os.altsep, os.sep)
+        filename = file_path.rpartition(os.sep)[2]
+        data_object = DataObjectHolder(DataObjectIdentifier(filename), headers, lambda: data)
+        bisect.insort(self.data_objects, data_object, key=_SORT_KEY)
         if self.split_by_id:
-            self._splitByID(self.data_objects[-1])
+            for split_data_object in data_object.splitById(self.split_by_id):
+                bisect.insort(self.split_data_objects, split_data_object, key=_SORT_KEY)
         self.update()
 
-    def addDataListener(self, listener: Callable[..., None]):
-        self.data_object_listeners.append(listener)
+    def addDataObjectsBatch(self, files: Iterable[Tuple[str, DataFrame]]):
+        """
+        Add a (file_path, data) pair per file, updating listeners once at the end
+        """
+        with self.batchUpdate():
+            for file_path, data in files:
+                self.addDataObject(file_path, data)
 
-    def _splitByID(self, data_object: DataObjectHolder):
-        split_data = list(data_object.data.groupby(self.split_by_id))
-        for id, datum in split_data:
-            self.split_data_objects.append(
-                DataObjectHolder(
-                    DataObjectIdentifier(data_object.filename.filename, id=f"{id}"),
-                    data_object.headers,
-                    datum))
+    def addDataListener(self, listener: Callable[..., None], incremental: bool = False):
+        """
+        Incremental listeners are called with the lists of added and removed DataObjectHolders
+        rather than all of them
+        """
+        if not incremental:
+            self.data_object_listeners.append(listener)
+            return
+        self.incremental_data_object_listeners.append(listener)
+        # Bring a late listener up to date with what the others have already seen
+        if self._notified_data_objects:
+            listener(list(self._notified_data_objects), [])
+
+    def addHeaderListener(self, listener: Callable[[Tuple[str, ...]], None]):
+        self.header_listeners.append(listener)
 
     def addSplitByID(self, id: str):
+        # Re-selecting the current split changes nothing
+        if id == (self.split_by_id or ""):
+            return
+        self._version += 1
         self.split_data_objects.clear()
         if id == "":
             self.split_by_id = None
         else:
             self.split_by_id = id
             for data in self.data_objects:
-                self._splitByID(data)
+                self.split_data_objects.extend(data.splitById(id))
+            # Rebuilding from scratch, so one sort beats inserting each in place
+            self.split_data_objects.sort(key=_SORT_KEY)
         self.update()
 
     def reset(self):
+        self._version += 1
         self.data_objects.clear()
         self.split_data_objects.clear()
         self.split_by_id = None
@@ -114,10 +290,10 @@ class AppState:
         self.t_header = header
 
     def set_x_range(self, range_list: str):
-        self.x_range = [tick.strip() for tick in range_list.split(",")]
+        self.x_range = _RANGE_RE.split(range_list.strip())
 
     def set_y_range(self, range_list: str):
-        self.y_range = [tick.strip() for tick in range_list.split(",")]
+        self.y_range = _RANGE_RE.split(range_list.strip())
 
     def set_plot_structures(self, fig: figure.Figure, ax: axes.Axes):
         self.matpltlib_fig = fig